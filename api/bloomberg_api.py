@@ -2,18 +2,91 @@
 Bloomberg Data License API client
 """
 
-import datetime
+import hashlib
+import io
 import json
 import logging
 import os
+import secrets
 import shutil
+import threading
 import time
-import uuid
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urljoin
 
 from oauthlib.oauth2 import BackendApplicationClient
+from requests.adapters import HTTPAdapter
+from requests.exceptions import HTTPError
+from urllib3.util.retry import Retry
+from utils.fields import FIELD_MNEMONICS
 from .session import DLRestApiSession
 
+# Use orjson for JSON encoding and decoding when it is installed
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Connection pool settings for the Bloomberg API session
+POOL_CONNECTIONS = 32
+POOL_MAXSIZE = 32
+
+# Retry policy for transient errors (POST is left out so data requests are never duplicated)
+RETRY_POLICY = Retry(
+    total=5,
+    backoff_factor=0.5,
+    status_forcelist=[429, 500, 502, 503, 504],
+    allowed_methods=frozenset(['GET']),
+    raise_on_status=False
+)
+
+# Polling backoff for content responses (seconds)
+POLL_INITIAL_DELAY = 2.0
+POLL_MAX_DELAY = 60.0
+POLL_BACKOFF_FACTOR = 1.5
+POLL_LOG_EVERY = 5
+
+# Seconds a discovered catalog identifier is reused from the on-disk cache
+CATALOG_CACHE_TTL = 24 * 60 * 60
+
+# Buffer size used when streaming result files to disk
+DOWNLOAD_BUFFER_SIZE = 4 * 1024 * 1024
+
+# Per-request headers, built once and shared by every call
+JSON_HEADERS = {'Content-Type': 'application/json'}
+GZIP_HEADERS = {'Accept-Encoding': 'gzip'}
+
+# Field list requested when the caller does not provide one
+DEFAULT_FIELDS = tuple({'mnemonic': mnemonic} for mnemonic in FIELD_MNEMONICS)
+
+# Constant parts of the data request payload
+REQUEST_TEMPLATE = {
+    '@type': 'DataRequest',
+    'description': 'Bloomberg financial data request using identifiers from JSON file',
+    'trigger': {
+        '@type': 'SubmitTrigger',
+    },
+    'formatting': {
+        '@type': 'MediaType',
+        'outputMediaType': 'application/json',
+    },
+}
+
+def _json_loads(data):
+    """
+    Parse a JSON document, using orjson when available.
+    
+    Args:
+        data (bytes): The JSON document
+        
+    Returns:
+        The parsed JSON value
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
 class BloombergApiClient:
     """Client for interacting with Bloomberg Data License API."""
     
@@ -36,18 +109,52 @@ class BloombergApiClient:
         self.downloads_path = config['paths']['downloads_dir']
         self.identifiers_file = config['paths']['identifiers_file']
         
+        # Cache the access token and catalog ID per client ID so restarts can skip their round-trips
+        client_hash = hashlib.sha256(self.client_id.encode('utf-8')).hexdigest()[:16]
+        self.token_cache_path = os.path.join(self.downloads_path, f'.bbg_token_{client_hash}.json')
+        self.catalog_cache_path = os.path.join(config['paths']['data_dir'], f'.catalog_cache_{client_hash}.json')
+        
         # Initialize session
         self._initialize_session()
         
-        # Catalog ID will be set later
+        # Base URL of the catalogs endpoint
+        self.catalogs_url = f'{self.host.rstrip("/")}/eap/catalogs/'
+        
+        # Catalog ID and the URLs derived from it will be set later
         self.catalog_id = None
+        self.requests_url = None
+        self.responses_url = None
+        self._catalog_from_cache = False
+        self._catalog_lock = threading.Lock()
+        
+        # Identifiers cached by (path, modification time)
+        self._identifiers = None
+        self._identifiers_key = None
 
     def _initialize_session(self):
         """Initialize the OAuth2 session with Bloomberg API."""
         client = BackendApplicationClient(client_id=self.client_id)
-        self.session = DLRestApiSession(client=client)
+        self.session = DLRestApiSession(
+            client=client,
+            oauth2_endpoint=self.oauth_endpoint,
+            client_secret=self.client_secret,
+            token_cache_path=self.token_cache_path
+        )
+        
+        # Reuse keep-alive connections across polling and download calls
+        adapter = HTTPAdapter(
+            pool_connections=POOL_CONNECTIONS,
+            pool_maxsize=POOL_MAXSIZE,
+            max_retries=RETRY_POLICY
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
         self.session.headers['api-version'] = '2'
-        self.session.request_token(self.oauth_endpoint, self.client_secret)
+        self.session.headers['Connection'] = 'keep-alive'
+        
+        if not self.session.load_cached_token():
+            self.session.request_token(self.oauth_endpoint, self.client_secret)
     
     def load_identifiers(self):
         """
@@ -57,15 +164,22 @@ class BloombergApiClient:
             list: The list of identifier objects
         """
         try:
-            with open(self.identifiers_file, 'r') as file:
-                identifiers = json.load(file)
-                self.logger.info(f"Successfully loaded {len(identifiers)} identifiers from JSON file")
-                return identifiers
+            cache_key = (self.identifiers_file, os.path.getmtime(self.identifiers_file))
+            if self._identifiers is not None and self._identifiers_key == cache_key:
+                return self._identifiers
+            
+            with open(self.identifiers_file, 'rb') as file:
+                identifiers = _json_loads(file.read())
+                self.logger.info("Successfully loaded %s identifiers from JSON file", len(identifiers))
+            
+            self._identifiers = identifiers
+            self._identifiers_key = cache_key
+            return identifiers
         except FileNotFoundError:
-            self.logger.error(f"Identifiers file not found: {self.identifiers_file}")
+            self.logger.error("Identifiers file not found: %s", self.identifiers_file)
             raise
         except json.JSONDecodeError:
-            self.logger.error(f"Invalid JSON format in identifiers file: {self.identifiers_file}")
+            self.logger.error("Invalid JSON format in identifiers file: %s", self.identifiers_file)
             raise
     
     def discover_catalog_id(self):
@@ -75,18 +189,69 @@ class BloombergApiClient:
         Returns:
             str: The catalog identifier
         """
-        catalogs_url = urljoin(self.host, '/eap/catalogs/')
-        response = self.session.get(catalogs_url)
+        if self.catalog_id:
+            return self.catalog_id
+        
+        cached_catalog_id = self._load_cached_catalog_id()
+        if cached_catalog_id:
+            self._set_catalog_id(cached_catalog_id)
+            self._catalog_from_cache = True
+            return self.catalog_id
+        
+        response = self.session.get(self.catalogs_url)
         
-        catalogs = response.json()['contains']
+        catalogs = _json_loads(response.content)['contains']
         for catalog in catalogs:
             if catalog['subscriptionType'] == 'scheduled':
-                self.catalog_id = catalog['identifier']
+                self._set_catalog_id(catalog['identifier'])
+                self._catalog_from_cache = False
+                self._save_cached_catalog_id()
                 return self.catalog_id
                 
-        self.logger.error('Scheduled catalog not in %r', response.json()['contains'])
+        self.logger.error('Scheduled catalog not in %r', catalogs)
         raise RuntimeError('Scheduled catalog not found')
     
+    def _load_cached_catalog_id(self):
+        """
+        Load the catalog identifier from the catalog cache file.
+        
+        Returns:
+            str: The cached catalog identifier, or None if missing or older than CATALOG_CACHE_TTL
+        """
+        try:
+            with open(self.catalog_cache_path, 'rb') as cache_file:
+                cache = _json_loads(cache_file.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self.logger.warning("Ignoring unreadable catalog cache %s: %s", self.catalog_cache_path, e)
+            return None
+        
+        if time.time() - cache.get('ts', 0) >= CATALOG_CACHE_TTL:
+            return None
+        
+        self.logger.info("Using cached catalog identifier %s", cache.get('catalog_id'))
+        return cache.get('catalog_id')
+    
+    def _save_cached_catalog_id(self):
+        """Write the current catalog identifier to the catalog cache file."""
+        try:
+            with open(self.catalog_cache_path, 'w') as cache_file:
+                json.dump({'catalog_id': self.catalog_id, 'ts': time.time()}, cache_file)
+        except OSError as e:
+            self.logger.warning("Could not write catalog cache %s: %s", self.catalog_cache_path, e)
+    
+    def _set_catalog_id(self, catalog_id):
+        """
+        Set the catalog identifier and precompute the URLs that depend on it.
+        
+        Args:
+            catalog_id (str): The catalog identifier
+        """
+        self.catalog_id = catalog_id
+        self.requests_url = f'{self.catalogs_url}{catalog_id}/requests/'
+        self.responses_url = f'{self.catalogs_url}{catalog_id}/content/responses/'
+    
     def create_request(self, identifiers, fields=None):
         """
         Create a data request with Bloomberg API.
@@ -98,61 +263,78 @@ class BloombergApiClient:
         Returns:
             tuple: (request_name, request_id, request_url)
         """
-        if fields is None:
-            fields = [
-                {'mnemonic': 'TOT_DEBT_TO_TOT_ASSET'},
-                {'mnemonic': 'CASH_DVD_COVERAGE'},
-                {'mnemonic': 'TOT_DEBT_TO_EBITDA'},
-                {'mnemonic': 'CUR_RATIO'},
-                {'mnemonic': 'QUICK_RATIO'},
-                {'mnemonic': 'GROSS_MARGIN'},
-                {'mnemonic': 'INTEREST_COVERAGE_RATIO'},
-                {'mnemonic': 'EBITDA_MARGIN'},
-                {'mnemonic': 'TOT_LIAB_AND_EQY'},
-                {'mnemonic': 'NET_DEBT_TO_SHRHLDR_EQTY'}
-            ]
-        
-        request_name = 'BloombergDataRequest' + str(uuid.uuid1())[:6]
+        request_name = 'BloombergDataRequest' + secrets.token_hex(3)
         
         request_payload = {
-            '@type': 'DataRequest',
+            **REQUEST_TEMPLATE,
             'name': request_name,
-            'description': 'Bloomberg financial data request using identifiers from JSON file',
             'universe': {
                 '@type': 'Universe',
                 'contains': identifiers
             },
             'fieldList': {
                 '@type': 'DataFieldList',
-                'contains': fields,
-            },
-            'trigger': {
-                '@type': 'SubmitTrigger',
-            },
-            'formatting': {
-                '@type': 'MediaType',
-                'outputMediaType': 'application/json',
+                'contains': fields if fields is not None else DEFAULT_FIELDS,
             },
         }
         
-        self.logger.info('Request component payload:\n%s', json.dumps(request_payload, indent=2))
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug('Request component payload:\n%s', json.dumps(request_payload, indent=2))
         
-        catalog_url = urljoin(self.host, f'/eap/catalogs/{self.catalog_id}/')
-        requests_url = urljoin(catalog_url, 'requests/')
-        response = self.session.post(requests_url, json=request_payload)
+        requests_url = self.requests_url
+        try:
+            response = self._post_json(requests_url, request_payload)
+        except HTTPError as e:
+            if e.response is None or e.response.status_code != 404:
+                raise
+            # A cached catalog identifier may be stale; rediscover it once and retry.
+            # Concurrent callers wait here and retry with the catalog the first one found.
+            with self._catalog_lock:
+                if self.requests_url == requests_url:
+                    if not self._catalog_from_cache:
+                        raise
+                    self.logger.warning("Cached catalog %s not found. Rediscovering...", self.catalog_id)
+                    self.catalog_id = None
+                    self._catalog_from_cache = False
+                    try:
+                        os.remove(self.catalog_cache_path)
+                    except OSError:
+                        pass
+                    self.discover_catalog_id()
+            response = self._post_json(self.requests_url, request_payload)
         
         request_location = response.headers['Location']
         request_url = urljoin(self.host, request_location)
-        request_id = json.loads(response.text)['request']['identifier']
+        request_id = _json_loads(response.content)['request']['identifier']
         
         self.logger.info('%s resource has been successfully created at %s',
                  request_name, request_url)
         
-        # Inspect the newly-created request component
-        self.session.get(request_url)
+        # Inspect the newly-created request component (debugging only, costs a round-trip)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.session.get(request_url)
         
         return request_name, request_id, request_url
     
+    def _post_json(self, url, payload):
+        """
+        POST a JSON payload, encoding it with orjson when available.
+        
+        Args:
+            url (str): The URL to post to
+            payload (dict): The JSON payload
+            
+        Returns:
+            Response: The response object from the API request
+        """
+        if ORJSON_AVAILABLE:
+            return self.session.post(
+                url,
+                data=orjson.dumps(payload),
+                headers=JSON_HEADERS
+            )
+        return self.session.post(url, json=payload)
+    
     def wait_for_response(self, request_name, request_id, timeout_minutes=45):
         """
         Poll the content responses endpoint to wait for results to be available.
@@ -165,32 +347,83 @@ class BloombergApiClient:
         Returns:
             str: The output key for downloading results
         """
-        responses_url = urljoin(self.host, f'/eap/catalogs/{self.catalog_id}/content/responses/')
+        for _, output_key in self.wait_for_responses({request_name: request_id}, timeout_minutes):
+            return output_key
+        return None
+    
+    def wait_for_responses(self, pending_requests, timeout_minutes=45):
+        """
+        Poll the content responses endpoint for several requests from a single loop.
         
-        params = {
-            'prefix': request_name,
-            'requestIdentifier': request_id,
-        }
+        Args:
+            pending_requests (dict): Mapping of request name to request identifier
+            timeout_minutes (int): The maximum time to wait in minutes
+            
+        Yields:
+            tuple: (request_name, output_key) for each request as its results become available
+        """
+        pending = dict(pending_requests)
         
-        reply_timeout = datetime.timedelta(minutes=timeout_minutes)
-        expiration_timestamp = datetime.datetime.utcnow() + reply_timeout
+        deadline = time.monotonic() + timeout_minutes * 60.0
         
-        while datetime.datetime.utcnow() < expiration_timestamp:
-            content_responses = self.session.get(responses_url, params=params)
-            response_contains = json.loads(content_responses.text)['contains']
+        delay = POLL_INITIAL_DELAY
+        attempt = 0
+        
+        while time.monotonic() < deadline:
+            retry_after = None
             
-            if len(response_contains) > 0:
-                output = response_contains[0]
-                self.logger.info('Response listing:\n%s', json.dumps(output, indent=2))
+            for request_name, request_id in list(pending.items()):
+                params = {
+                    'prefix': request_name,
+                    'requestIdentifier': request_id,
+                }
+                content_responses = self.session.get(self.responses_url, params=params)
+                response_contains = _json_loads(content_responses.content)['contains']
                 
-                output_key = output['key']
-                return output_key
-            else:
-                self.logger.info('Content not ready for download yet. Waiting for 30 seconds...')
-                time.sleep(30)
+                if len(response_contains) > 0:
+                    output = response_contains[0]
+                    self.logger.info('Response listing:\n%s', json.dumps(output, indent=2))
+                    
+                    del pending[request_name]
+                    yield request_name, output['key']
+                else:
+                    retry_after = max(retry_after or 0.0, self._retry_after_seconds(content_responses) or 0.0)
+            
+            if not pending:
+                return
+            
+            # Prefer the server's hint, otherwise back off exponentially; never sleep past the deadline
+            sleep_for = min(retry_after or delay, POLL_MAX_DELAY, max(0.0, deadline - time.monotonic()))
+            if attempt % POLL_LOG_EVERY == 0:
+                self.logger.info('Content for %s request(s) not ready for download yet. Waiting for %.0f seconds...',
+                                 len(pending), sleep_for)
+            time.sleep(sleep_for)
+            
+            delay = min(POLL_MAX_DELAY, max(POLL_INITIAL_DELAY, delay * POLL_BACKOFF_FACTOR))
+            attempt += 1
         
-        self.logger.info('Response not received within %s minutes. Exiting.', timeout_minutes)
-        return None
+        self.logger.info('Response not received within %s minutes for %s. Exiting.',
+                         timeout_minutes, ', '.join(pending))
+    
+    @staticmethod
+    def _retry_after_seconds(response):
+        """
+        Parse the Retry-After header of a response.
+        
+        Args:
+            response: The response object
+            
+        Returns:
+            float: The number of seconds to wait, or None if the header is missing or not a number
+        """
+        retry_after = response.headers.get('Retry-After')
+        if not retry_after:
+            return None
+        
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            return None
     
     def download_result(self, output_key):
         """
@@ -202,12 +435,10 @@ class BloombergApiClient:
         Returns:
             str: The path to the downloaded file
         """
-        output_url = urljoin(
-            self.host,
-            f'/eap/catalogs/{self.catalog_id}/content/responses/{output_key}'
-        )
+        output_url = f'{self.responses_url}{output_key}'
         
-        with self.session.get(output_url, stream=True) as response:
+        # Only accept gzip here: the body is written to disk undecoded
+        with self.session.get(output_url, stream=True, headers=GZIP_HEADERS) as response:
             output_filename = output_key
             
             if 'content-encoding' in response.headers:
@@ -220,15 +451,46 @@ class BloombergApiClient:
             
             output_file_path = os.path.join(self.downloads_path, output_filename)
             
+            # Write the body exactly as received; compressed files are decoded when read
+            response.raw.decode_content = False
+            
             with open(output_file_path, 'wb') as output_file:
                 self.logger.info('Loading file from: %s (can take a while) ...', output_url)
-                shutil.copyfileobj(response.raw, output_file)
+                shutil.copyfileobj(response.raw, output_file, length=DOWNLOAD_BUFFER_SIZE)
         
         self.logger.info('File downloaded: %s', output_filename)
         self.logger.debug('File location: %s', output_file_path)
         
         return output_file_path
     
+    def read_result_stream(self, output_key):
+        """
+        Read a result file from Bloomberg API into a pandas DataFrame without writing it to disk.
+        
+        Args:
+            output_key (str): The key for the output file
+            
+        Returns:
+            DataFrame: The data as a pandas DataFrame
+        """
+        import pandas as pd
+        
+        output_url = f'{self.responses_url}{output_key}'
+        
+        with self.session.get(output_url, stream=True, headers=GZIP_HEADERS) as response:
+            # urllib3 undoes the content encoding; a gzip file body is decoded by pandas
+            response.raw.decode_content = True
+            # The gzip reader reads past the end of the body, which must not close the stream
+            response.raw.auto_close = False
+            compression = 'gzip' if output_key.endswith('.gz') else None
+            
+            self.logger.info('Reading file from: %s (can take a while) ...', output_url)
+            reader = io.BufferedReader(response.raw, buffer_size=DOWNLOAD_BUFFER_SIZE)
+            df = pd.read_json(reader, compression=compression)
+        
+        self.logger.info("Successfully parsed data with %s rows", len(df))
+        return df
+    
     def read_result_file(self, file_path):
         """
         Read the downloaded file and return as a pandas DataFrame.
@@ -241,21 +503,27 @@ class BloombergApiClient:
         """
         try:
             import pandas as pd
-            with open(file_path, 'rb') as output_file:
-                df = pd.read_json(output_file, compression='gzip')
-                self.logger.info(f"Successfully parsed data with {len(df)} rows")
-                return df
+            df = pd.read_json(file_path, compression='infer')
+            self.logger.info("Successfully parsed data with %s rows", len(df))
+            return df
         except ImportError:
             self.logger.error("pandas not installed. Cannot read the file as DataFrame.")
             raise
         except Exception as e:
-            self.logger.error(f"Error reading result file: {str(e)}")
+            self.logger.error("Error reading result file: %s", e)
             raise
     
-    def fetch_financial_data(self):
+    def fetch_financial_data(self, return_dataframe=True, timeout_minutes=45, archive=True):
         """
         Fetch financial data from Bloomberg API.
         
+        Args:
+            return_dataframe (bool): Whether to read the downloaded file into a DataFrame.
+                When False, pandas is not imported and None is returned in its place.
+            timeout_minutes (int): The maximum time to wait for the response in minutes
+            archive (bool): Whether to keep the result file in the downloads directory.
+                When False, the result is read straight into a DataFrame and no path is returned.
+        
         Returns:
             tuple: (DataFrame, file_path) - The fetched data as a pandas DataFrame and the path to the file
         """
@@ -270,19 +538,125 @@ class BloombergApiClient:
             request_name, request_id, _ = self.create_request(identifiers)
             
             # Wait for the response
-            output_key = self.wait_for_response(request_name, request_id)
+            output_key = self.wait_for_response(request_name, request_id, timeout_minutes)
             if not output_key:
                 self.logger.error("Failed to receive response from Bloomberg API")
                 return None, None
             
-            # Download result
-            output_file_path = self.download_result(output_key)
+            # Download and read the result
+            return self._download_and_read(output_key, return_dataframe, archive)
+            
+        except Exception as e:
+            self.logger.error("Error fetching financial data: %s", e)
+            raise
+    
+    def _download_and_read(self, output_key, return_dataframe=True, archive=True):
+        """
+        Download a result file and read it as a pandas DataFrame.
+        
+        Args:
+            output_key (str): The key for the output file
+            return_dataframe (bool): Whether to read the result into a DataFrame
+            archive (bool): Whether to keep the result file in the downloads directory
+            
+        Returns:
+            tuple: (DataFrame, file_path) - DataFrame is None if return_dataframe is False,
+                file_path is None if the result was not written to disk
+        """
+        if return_dataframe and not archive:
+            return self.read_result_stream(output_key), None
+        
+        output_file_path = self.download_result(output_key)
+        if not return_dataframe:
+            return None, output_file_path
+        
+        df = self.read_result_file(output_file_path)
+        
+        return df, output_file_path
+    
+    def fetch_financial_data_parallel(self, chunk_size=500, max_workers=8, return_dataframe=True,
+                                      timeout_minutes=45, archive=True):
+        """
+        Fetch financial data from Bloomberg API using concurrent requests.
+        
+        The identifiers are split into chunks that are submitted as separate
+        data requests. All pending requests are polled from a single loop and
+        their results are downloaded in parallel as soon as they are ready.
+        
+        Args:
+            chunk_size (int): Maximum number of identifiers per data request
+            max_workers (int): Maximum number of concurrent HTTP calls
+            return_dataframe (bool): Whether to read the downloaded files into a DataFrame.
+                When False, pandas is not imported and None is returned in its place.
+            timeout_minutes (int): The maximum time to wait for all responses in minutes
+            archive (bool): Whether to keep the result files in the downloads directory.
+                When False, the results are read straight into DataFrames and no paths are returned.
+            
+        Returns:
+            tuple: (DataFrame, file_paths) - The combined data as a pandas DataFrame and the paths to the files,
+                or (None, None) if there are no identifiers or not all responses arrived
+        """
+        try:
+            # Discover catalog ID
+            self.discover_catalog_id()
+            
+            # Load identifiers and split them into chunks
+            identifiers = self.load_identifiers()
+            chunks = [identifiers[i:i + chunk_size] for i in range(0, len(identifiers), chunk_size)]
+            if not chunks:
+                self.logger.error("No identifiers to request")
+                return None, None
+            self.logger.info("Submitting %s data requests of up to %s identifiers", len(chunks), chunk_size)
+            
+            frames = []
+            file_paths = []
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                # Create the data requests
+                pending_requests = {
+                    request_name: request_id
+                    for request_name, request_id, _ in executor.map(self.create_request, chunks)
+                }
+                
+                # Wait for all responses and download each one as soon as it is available
+                downloads = {
+                    request_name: executor.submit(self._download_and_read, output_key, return_dataframe, archive)
+                    for request_name, output_key in self.wait_for_responses(pending_requests, timeout_minutes)
+                }
+                if len(downloads) < len(pending_requests):
+                    self.logger.error("Failed to receive response from Bloomberg API")
+                    self._abandon_downloads(downloads.values())
+                    return None, None
+                
+                # Collect the results in request order so rows follow the identifiers file
+                for request_name in pending_requests:
+                    df, output_file_path = downloads[request_name].result()
+                    frames.append(df)
+                    file_paths.append(output_file_path)
             
-            # Read the result file
-            df = self.read_result_file(output_file_path)
+            if not return_dataframe:
+                return None, file_paths
             
-            return df, output_file_path
+            import pandas as pd
+            return pd.concat(frames, ignore_index=True), file_paths if archive else None
             
         except Exception as e:
-            self.logger.error(f"Error fetching financial data: {str(e)}")
-            raise
\ No newline at end of file
+            self.logger.error("Error fetching financial data: %s", e)
+            raise
+    
+    def _abandon_downloads(self, downloads):
+        """
+        Cancel downloads that have not started and report the files of those that finish.
+        
+        Args:
+            downloads (iterable): The futures returned by _download_and_read
+        """
+        for future in downloads:
+            if future.cancel():
+                continue
+            try:
+                _, output_file_path = future.result()
+            except Exception as e:
+                self.logger.warning("Download of a partial result failed: %s", e)
+                continue
+            if output_file_path:
+                self.logger.warning("Partial result left in %s", output_file_path)
@@ -4,16 +4,94 @@ DLRestApiSession - Custom session class for Bloomberg Data License REST API
 
 import json
 import logging
+import os
+import threading
+import time
 from oauthlib.oauth2 import BackendApplicationClient, TokenExpiredError
+from requests.exceptions import HTTPError
 from requests_oauthlib import OAuth2Session
 
+# Maximum number of bytes of a response body written to the log
+RESPONSE_LOG_LIMIT = 4096
+
+# Maximum number of bytes of an error response body included in the raised HTTPError
+ERROR_BODY_LIMIT = 1024
+
+# Seconds before expiry at which a cached token is no longer reused
+TOKEN_EXPIRY_BUFFER = 60
+
+# Seconds before expiry at which a token is refreshed in the background
+TOKEN_STALE_WINDOW = 180
+
+# Headers whose values are masked when requests are logged
+SENSITIVE_HEADERS = frozenset(['authorization', 'proxy-authorization', 'cookie'])
+
+class _SafeHeaders:
+    """Log-friendly view of request headers that masks credentials; formatted only when emitted."""
+    
+    def __init__(self, headers):
+        self.headers = headers
+    
+    def __str__(self):
+        return str({
+            name: '***' if name.lower() in SENSITIVE_HEADERS else value
+            for name, value in self.headers.items()
+        })
+    
+    __repr__ = __str__
+
+class TokenCache:
+    """Freshness windows of an OAuth2 access token."""
+    
+    FRESH = 'fresh'
+    STALE = 'stale'
+    EXPIRED = 'expired'
+    
+    def __init__(self, token=None, stale_window=TOKEN_STALE_WINDOW):
+        """
+        Initialize a TokenCache from an OAuth2 token.
+        
+        Args:
+            token (dict, optional): The token returned by the token endpoint
+            stale_window (int): Seconds before expiry at which the token becomes stale
+        """
+        expires_at = token.get('expires_at', 0) if token else 0
+        self.stale_until = expires_at
+        self.fresh_until = expires_at - stale_window
+    
+    def state(self):
+        """
+        Return the current state of the token.
+        
+        Returns:
+            str: One of 'fresh', 'stale' or 'expired'
+        """
+        now = time.time()
+        if now < self.fresh_until:
+            return self.FRESH
+        if now < self.stale_until:
+            return self.STALE
+        return self.EXPIRED
+
 class DLRestApiSession(OAuth2Session):
     """Custom session class for making requests to a DL REST API using OAuth2 authentication."""
     
-    def __init__(self, *args, **kwargs):
-        """Initialize a DLRestApiSession instance."""
+    def __init__(self, *args, oauth2_endpoint=None, client_secret=None, token_cache_path=None, **kwargs):
+        """
+        Initialize a DLRestApiSession instance.
+        
+        Args:
+            oauth2_endpoint (str, optional): The OAuth2 token endpoint URL used for refreshes
+            client_secret (str, optional): The client secret used for refreshes
+            token_cache_path (str, optional): File used to persist the access token between runs
+        """
         super().__init__(*args, **kwargs)
         self.logger = logging.getLogger(__name__)
+        self.oauth2_endpoint = oauth2_endpoint
+        self.client_secret = client_secret
+        self.token_cache_path = token_cache_path
+        self.token_cache = TokenCache()
+        self._refresh_lock = threading.Lock()
 
     def request_token(self, oauth2_endpoint, client_secret):
         """
@@ -23,27 +101,122 @@ class DLRestApiSession(OAuth2Session):
             oauth2_endpoint (str): The OAuth2 token endpoint URL
             client_secret (str): The client secret for authentication
         """
-        self.token = self.fetch_token(
+        self.oauth2_endpoint = oauth2_endpoint
+        self.client_secret = client_secret
+        
+        # Fetch with a separate session: fetch_token clears the token of the session it runs on,
+        # which would leave concurrent requests unauthenticated until the new token arrives
+        token_session = OAuth2Session(client=BackendApplicationClient(client_id=self.client_id))
+        token = token_session.fetch_token(
             token_url=oauth2_endpoint,
             client_secret=client_secret
         )
+        
+        # Only replace the current token once the new one has been fetched successfully
+        self.token = token
+        self.token_cache = TokenCache(token)
+        self._save_cached_token()
+
+    def load_cached_token(self):
+        """
+        Load a previously fetched access token from the token cache file.
+        
+        Returns:
+            bool: True if a token was loaded that is still valid, False otherwise
+        """
+        if not self.token_cache_path or not os.path.exists(self.token_cache_path):
+            return False
+        
+        if os.name == 'posix' and os.stat(self.token_cache_path).st_mode & 0o077:
+            self.logger.warning("Ignoring token cache %s: it is readable by other users", self.token_cache_path)
+            return False
+        
+        try:
+            with open(self.token_cache_path, 'r') as cache_file:
+                token = json.load(cache_file)
+        except (OSError, ValueError) as e:
+            self.logger.warning("Ignoring unreadable token cache %s: %s", self.token_cache_path, e)
+            return False
+        
+        if token.get('expires_at', 0) - TOKEN_EXPIRY_BUFFER <= time.time():
+            self.logger.info("Cached token has expired")
+            return False
+        
+        self.token = token
+        self.token_cache = TokenCache(token)
+        self.logger.info("Reusing cached access token")
+        return True
+
+    def _save_cached_token(self):
+        """Write the current access token to the token cache file, readable only by the owner."""
+        if not self.token_cache_path:
+            return
+        
+        # Write to a private temporary file and rename it, so readers never see a partial token
+        temp_path = f'{self.token_cache_path}.{os.getpid()}.tmp'
+        try:
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as cache_file:
+                json.dump(self.token, cache_file)
+            os.replace(temp_path, self.token_cache_path)
+        except OSError as e:
+            self.logger.warning("Could not write token cache %s: %s", self.token_cache_path, e)
 
     def request(self, *args, **kwargs):
         """
-        Override the parent class method to handle TokenExpiredError by refreshing the token.
+        Override the parent class method to keep the access token valid.
+        
+        A stale token is refreshed in a background thread while the current one is
+        still used. An expired token (TokenExpiredError) is refreshed before retrying,
+        by only one thread at a time; the others reuse the token it fetched. A token
+        the server rejects with HTTP 401 (e.g. revoked) is refreshed and the request
+        retried once.
         
         Returns:
             Response: The response object from the API request
         """
+        if self.token_cache.state() == TokenCache.STALE:
+            self._start_background_refresh()
+        
+        access_token = (self.token or {}).get('access_token')
         try:
             response = super().request(*args, **kwargs)
         except TokenExpiredError:
-            self.logger.info("Token expired. Refreshing...")
-            self.request_token(kwargs.get('oauth2_endpoint'), kwargs.get('client_secret'))
+            with self._refresh_lock:
+                # Another thread may have refreshed the token while this one waited
+                if self.token_cache.state() == TokenCache.EXPIRED:
+                    self.logger.info("Token expired. Refreshing...")
+                    self.request_token(self.oauth2_endpoint, self.client_secret)
+            response = super().request(*args, **kwargs)
+        except HTTPError as e:
+            if e.response is None or e.response.status_code != 401 or not self.oauth2_endpoint:
+                raise
+            with self._refresh_lock:
+                # Skip the refresh if another thread already replaced the rejected token
+                if (self.token or {}).get('access_token') == access_token:
+                    self.logger.info("Access token rejected by the server. Refreshing...")
+                    self.request_token(self.oauth2_endpoint, self.client_secret)
             response = super().request(*args, **kwargs)
 
         return response
 
+    def _start_background_refresh(self):
+        """Start a background token refresh unless one is already running."""
+        if not self.oauth2_endpoint or not self._refresh_lock.acquire(blocking=False):
+            return
+        
+        threading.Thread(target=self._refresh_locked, daemon=True).start()
+
+    def _refresh_locked(self):
+        """Refresh the token and release the refresh lock acquired by the caller."""
+        try:
+            self.logger.info("Token close to expiry. Refreshing in background...")
+            self.request_token(self.oauth2_endpoint, self.client_secret)
+        except Exception as e:
+            self.logger.warning("Background token refresh failed: %s", e)
+        finally:
+            self._refresh_lock.release()
+
     def send(self, request, **kwargs):
         """
         Override the parent class method to log request and response information.
@@ -54,22 +227,30 @@ class DLRestApiSession(OAuth2Session):
         Returns:
             Response: The response object from the API request
         """
-        self.logger.info("Request being sent to HTTP server: %s, %s, %s", 
-                     request.method, request.url, request.headers)
+        self.logger.info("Request being sent to HTTP server: %s, %s", request.method, request.url)
+        self.logger.debug("Request headers: %s", _SafeHeaders(request.headers))
 
         response = super().send(request, **kwargs)
 
         self.logger.info("Response status: %s", response.status_code)
         self.logger.info("Response x-request-id: %s", response.headers.get("x-request-id"))
+        self.logger.debug("Response encoding: %s, length: %s",
+                          response.headers.get("Content-Encoding", "identity"),
+                          response.headers.get("Content-Length"))
 
         if response.ok:
-            # Filter out file download responses and empty responses.
-            if not response.headers.get("Content-Disposition") and response.content:
-                self.logger.debug("Response content: %s", json.dumps(response.json(), indent=2))
+            # Filter out file download responses and empty responses; only parse when debugging.
+            if (self.logger.isEnabledFor(logging.DEBUG)
+                    and not response.headers.get("Content-Disposition") and response.content):
+                self.logger.debug("Response content: %s",
+                                  response.content[:RESPONSE_LOG_LIMIT].decode('utf-8', 'replace'))
         else:
-            raise RuntimeError(
+            # Don't assume error bodies are JSON; decode only a prefix and skip charset detection
+            details = response.content[:ERROR_BODY_LIMIT].decode('utf-8', 'replace')
+            raise HTTPError(
                 '\n\tUnexpected response status code: {c}\nDetails: {r}'.format(
-                    c=str(response.status_code), r=response.json())
+                    c=str(response.status_code), r=details),
+                response=response
             )
 
         return response
\ No newline at end of file
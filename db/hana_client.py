@@ -3,7 +3,11 @@ SAP HANA database client for storing Bloomberg financial data
 """
 
 import datetime
+import itertools
 import logging
+import re
+
+from utils.fields import FIELD_MNEMONICS
 
 # Import SAP HANA Python client
 try:
@@ -14,6 +18,18 @@ except ImportError:
     logging.warning("hdbcli package not installed. SAP HANA integration will not work.")
     logging.warning("Install using: pip install hdbcli")
 
+# Number of rows sent to SAP HANA per executemany call
+INSERT_BATCH_SIZE = 10000
+
+# Schema and table names must match this pattern since identifiers cannot be bound as parameters
+IDENTIFIER_PATTERN = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+
+# Response columns that, with the load date, form the table's primary key
+KEY_COLUMNS = ('identifierType', 'identifierValue')
+
+# Columns that may hold the Bloomberg fields as nested dictionaries, in lookup order
+NESTED_FIELD_CONTAINERS = ('data', 'fields', 'values', 'results')
+
 class HanaClient:
     """Client for interacting with SAP HANA database."""
     
@@ -37,8 +53,9 @@ class HanaClient:
         self.password = config['hana']['password']
         self.schema = config['hana']['schema']
         
-        # Connection will be set later
+        # Connection and its reusable cursor will be set later
         self.connection = None
+        self._cursor = None
         
     def connect(self):
         """
@@ -52,19 +69,25 @@ class HanaClient:
                 address=self.address,
                 port=int(self.port),
                 user=self.user,
-                password=self.password
+                password=self.password,
+                # hdbcli autocommits every statement by default; insert_data commits once per load
+                autocommit=False
             )
+            self._cursor = self.connection.cursor()
             
             self.logger.info("Successfully connected to SAP HANA at %s:%s", 
                          self.address, self.port)
             return True
             
         except Exception as e:
-            self.logger.error("Failed to connect to SAP HANA: %s", str(e))
+            self.logger.error("Failed to connect to SAP HANA: %s", e)
             return False
     
     def close(self):
         """Close the connection to SAP HANA database."""
+        if self._cursor:
+            self._cursor.close()
+            self._cursor = None
         if self.connection:
             self.connection.close()
             self.logger.info("Closed connection to SAP HANA")
@@ -85,12 +108,11 @@ class HanaClient:
             return False
         
         try:
-            cursor = self.connection.cursor()
+            self._validate_identifier(schema_name)
+            cursor = self._cursor
             
             # Check if schema exists
-            cursor.execute(f"""
-            SELECT COUNT(*) FROM SYS.SCHEMAS WHERE SCHEMA_NAME = '{schema_name}'
-            """)
+            cursor.execute("SELECT COUNT(*) FROM SYS.SCHEMAS WHERE SCHEMA_NAME = ?", (schema_name,))
             
             schema_exists = cursor.fetchone()[0] > 0
             
@@ -98,172 +120,254 @@ class HanaClient:
                 cursor.execute(f"""
                 CREATE SCHEMA "{schema_name}"
                 """)
-                self.logger.info(f'Successfully created schema "{schema_name}" in SAP HANA')
+                self.logger.info('Successfully created schema "%s" in SAP HANA', schema_name)
             else:
-                self.logger.info(f'Schema "{schema_name}" already exists in SAP HANA')
+                self.logger.info('Schema "%s" already exists in SAP HANA', schema_name)
                 
-            cursor.close()
             return True
             
         except Exception as e:
-            self.logger.error(f"Error creating schema: {str(e)}")
+            self.logger.error("Error creating schema: %s", e)
             return False
     
     def create_table(self, schema_name, table_name):
         """
         Create a table in SAP HANA for storing the Bloomberg data.
         
+        An existing table is kept, but must already have the AS_OF_DATE primary key layout.
+        
         Args:
             schema_name (str): The schema name in SAP HANA
             table_name (str): The table name to create
             
         Returns:
-            bool: True if successful, False otherwise
+            bool: True if the table exists with the expected layout, False otherwise
         """
         if not self.connection:
             self.logger.error("No connection to SAP HANA. Cannot create table.")
             return False
         
         try:
-            cursor = self.connection.cursor()
+            self._validate_identifier(schema_name)
+            self._validate_identifier(table_name)
+            cursor = self._cursor
             
             # Create table with columns for common financial data fields
+            # One row per security and day, so re-runs on the same day update rows in place
+            column_definitions = ",\n                ".join([
+                '"TICKER" NVARCHAR(50)',
+                '"IDENTIFIER_TYPE" NVARCHAR(20) NOT NULL',
+                '"IDENTIFIER_VALUE" NVARCHAR(100) NOT NULL',
+                *(f'"{mnemonic}" DECIMAL(18,6)' for mnemonic in FIELD_MNEMONICS),
+                '"AS_OF_DATE" DATE NOT NULL',
+                '"TIMESTAMP" TIMESTAMP',
+                'PRIMARY KEY ("IDENTIFIER_TYPE", "IDENTIFIER_VALUE", "AS_OF_DATE")'
+            ])
             create_table_sql = f"""
             CREATE TABLE IF NOT EXISTS "{schema_name}"."{table_name}" (
-                "ID" INTEGER GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
-                "TICKER" NVARCHAR(50),
-                "IDENTIFIER_TYPE" NVARCHAR(20),
-                "IDENTIFIER_VALUE" NVARCHAR(100),
-                "TOT_DEBT_TO_TOT_ASSET" DECIMAL(18,6),
-                "CASH_DVD_COVERAGE" DECIMAL(18,6),
-                "TOT_DEBT_TO_EBITDA" DECIMAL(18,6),
-                "CUR_RATIO" DECIMAL(18,6),
-                "QUICK_RATIO" DECIMAL(18,6),
-                "GROSS_MARGIN" DECIMAL(18,6),
-                "INTEREST_COVERAGE_RATIO" DECIMAL(18,6),
-                "EBITDA_MARGIN" DECIMAL(18,6),
-                "TOT_LIAB_AND_EQY" DECIMAL(18,6),
-                "NET_DEBT_TO_SHRHLDR_EQTY" DECIMAL(18,6),
-                "TIMESTAMP" TIMESTAMP
+                {column_definitions}
             )
             """
             
             cursor.execute(create_table_sql)
-            cursor.close()
             
-            self.logger.info(f'Successfully created table "{schema_name}"."{table_name}" in SAP HANA')
+            # CREATE TABLE IF NOT EXISTS keeps an existing table as it is; a table from before
+            # the (IDENTIFIER_TYPE, IDENTIFIER_VALUE, AS_OF_DATE) key would reject every UPSERT
+            cursor.execute(
+                "SELECT COUNT(*) FROM SYS.TABLE_COLUMNS "
+                "WHERE SCHEMA_NAME = ? AND TABLE_NAME = ? AND COLUMN_NAME = 'AS_OF_DATE'",
+                (schema_name, table_name)
+            )
+            if cursor.fetchone()[0] == 0:
+                self.logger.error('Table "%s"."%s" uses the old layout without AS_OF_DATE. '
+                                  'Migrate it to the primary key (IDENTIFIER_TYPE, IDENTIFIER_VALUE, AS_OF_DATE) '
+                                  'or drop it so it can be recreated.', schema_name, table_name)
+                return False
+            
+            self.logger.info('Successfully created table "%s"."%s" in SAP HANA', schema_name, table_name)
             return True
             
         except Exception as e:
-            self.logger.error(f"Error creating HANA table: {str(e)}")
+            self.logger.error("Error creating HANA table: %s", e)
             return False
     
     def insert_data(self, df, schema_name, table_name):
         """
         Insert data from DataFrame to SAP HANA table.
         
+        Rows are upserted on (IDENTIFIER_TYPE, IDENTIFIER_VALUE, AS_OF_DATE), so
+        loading the same day again replaces that day's values instead of duplicating them.
+        Nothing is written if the identifierType/identifierValue key columns are
+        missing or repeat within df, since rows would silently overwrite each other.
+        
         Args:
             df (DataFrame): The pandas DataFrame containing Bloomberg data
             schema_name (str): The schema name in SAP HANA
             table_name (str): The table name to insert into
             
         Returns:
-            int: The number of rows inserted
+            int: The number of rows inserted or updated
         """
         if not self.connection:
             self.logger.error("No connection to SAP HANA. Cannot insert data.")
             return 0
         
         try:
-            cursor = self.connection.cursor()
+            self._validate_identifier(schema_name)
+            self._validate_identifier(table_name)
+            cursor = self._cursor
             rows_inserted = 0
             timestamp = datetime.datetime.now()
             
+            columns = ["TICKER", "IDENTIFIER_TYPE", "IDENTIFIER_VALUE", *FIELD_MNEMONICS, "AS_OF_DATE", "TIMESTAMP"]
+            column_list = ", ".join(f'"{column}"' for column in columns)
+            placeholders = ", ".join("?" for _ in columns)
+            insert_sql = f"""
+            UPSERT "{schema_name}"."{table_name}" (
+                {column_list}
+            ) VALUES ({placeholders}) WITH PRIMARY KEY
+            """
+            
             # Process the Bloomberg API response DataFrame
             # NOTE: This data mapping might need to be customized based on the actual
             # structure of the Bloomberg API response
-            for index, row in df.iterrows():
+            # The key columns are never defaulted: a constant key would make every row overwrite the last
+            missing_keys = [column for column in KEY_COLUMNS if column not in df.columns]
+            if missing_keys:
+                self.logger.error("Cannot insert data: key columns %s are missing from the response (columns: %s)",
+                                  missing_keys, list(df.columns))
+                return 0
+            
+            duplicate_keys = df.duplicated(subset=list(KEY_COLUMNS)).sum()
+            if duplicate_keys:
+                self.logger.error("Cannot insert data: %s rows repeat an (identifierType, identifierValue) key",
+                                  duplicate_keys)
+                return 0
+            
+            fields = self._flatten_fields(df)
+            rows = list(zip(
+                self._column_or_default(df, 'ticker', ''),
+                df['identifierType'],
+                df['identifierValue'],
+                *(fields[mnemonic] for mnemonic in FIELD_MNEMONICS),
+                itertools.repeat(timestamp.date(), len(df)),
+                itertools.repeat(timestamp, len(df))
+            ))
+            
+            # Insert in batches, retrying row by row only when a batch fails
+            for start in range(0, len(rows), INSERT_BATCH_SIZE):
+                batch = rows[start:start + INSERT_BATCH_SIZE]
                 try:
-                    # Extract data from DataFrame
-                    # This is a simplified example that needs to be adjusted based on 
-                    # the actual structure of your Bloomberg data
-                    ticker = row.get('ticker', '')
-                    identifier_type = row.get('identifierType', '')
-                    identifier_value = row.get('identifierValue', '')
-                    
-                    # Extract financial metrics
-                    tot_debt_to_asset = self._extract_value(row, 'TOT_DEBT_TO_TOT_ASSET')
-                    cash_dvd_coverage = self._extract_value(row, 'CASH_DVD_COVERAGE')
-                    tot_debt_to_ebitda = self._extract_value(row, 'TOT_DEBT_TO_EBITDA')
-                    cur_ratio = self._extract_value(row, 'CUR_RATIO')
-                    quick_ratio = self._extract_value(row, 'QUICK_RATIO')
-                    gross_margin = self._extract_value(row, 'GROSS_MARGIN')
-                    interest_coverage = self._extract_value(row, 'INTEREST_COVERAGE_RATIO')
-                    ebitda_margin = self._extract_value(row, 'EBITDA_MARGIN')
-                    tot_liab_eqy = self._extract_value(row, 'TOT_LIAB_AND_EQY')
-                    net_debt_shrhldr = self._extract_value(row, 'NET_DEBT_TO_SHRHLDR_EQTY')
-                    
-                    # Insert into HANA
-                    insert_sql = f"""
-                    INSERT INTO "{schema_name}"."{table_name}" (
-                        "TICKER", "IDENTIFIER_TYPE", "IDENTIFIER_VALUE",
-                        "TOT_DEBT_TO_TOT_ASSET", "CASH_DVD_COVERAGE", "TOT_DEBT_TO_EBITDA",
-                        "CUR_RATIO", "QUICK_RATIO", "GROSS_MARGIN",
-                        "INTEREST_COVERAGE_RATIO", "EBITDA_MARGIN", "TOT_LIAB_AND_EQY",
-                        "NET_DEBT_TO_SHRHLDR_EQTY", "TIMESTAMP"
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """
-                    
-                    cursor.execute(insert_sql, (
-                        ticker, identifier_type, identifier_value,
-                        tot_debt_to_asset, cash_dvd_coverage, tot_debt_to_ebitda,
-                        cur_ratio, quick_ratio, gross_margin,
-                        interest_coverage, ebitda_margin, tot_liab_eqy,
-                        net_debt_shrhldr, timestamp
-                    ))
-                    
-                    rows_inserted += 1
-                    
-                except Exception as row_error:
-                    self.logger.warning(f"Error inserting row {index}: {str(row_error)}")
-                    continue
+                    cursor.executemany(insert_sql, batch)
+                    rows_inserted += len(batch)
+                except Exception as batch_error:
+                    self.logger.warning("Error inserting batch starting at row %s: %s. Retrying row by row.",
+                                        start, batch_error)
+                    rows_inserted += self._insert_rows(cursor, insert_sql, batch, start)
             
             self.connection.commit()
-            cursor.close()
             
-            self.logger.info(f'Successfully inserted {rows_inserted} rows into "{schema_name}"."{table_name}"')
+            self.logger.info('Successfully inserted %s rows into "%s"."%s"', rows_inserted, schema_name, table_name)
             return rows_inserted
             
         except Exception as e:
-            self.logger.error(f"Error inserting data to HANA: {str(e)}")
+            self.logger.error("Error inserting data to HANA: %s", e)
+            try:
+                self.connection.rollback()
+            except Exception as rollback_error:
+                self.logger.warning("Error rolling back HANA transaction: %s", rollback_error)
             return 0
     
-    def _extract_value(self, row, field_name):
+    @staticmethod
+    def _validate_identifier(name):
+        """
+        Check that a schema or table name is safe to quote into SQL.
+        
+        Args:
+            name (str): The identifier to check
+            
+        Raises:
+            ValueError: If the identifier contains unsupported characters
+        """
+        if not name or not IDENTIFIER_PATTERN.fullmatch(name):
+            raise ValueError(f"Invalid SAP HANA identifier: {name!r}")
+    
+    def _insert_rows(self, cursor, insert_sql, rows, offset=0):
+        """
+        Upsert rows one at a time, skipping rows that fail.
+        
+        Args:
+            cursor: The database cursor
+            insert_sql (str): The parameterized UPSERT statement
+            rows (list): The parameter tuples to insert
+            offset (int): Position of the first row in the DataFrame, used for logging
+            
+        Returns:
+            int: The number of rows inserted or updated
+        """
+        rows_inserted = 0
+        for position, params in enumerate(rows, start=offset):
+            try:
+                cursor.execute(insert_sql, params)
+                rows_inserted += 1
+            except Exception as row_error:
+                self.logger.warning("Error inserting row %s: %s", position, row_error)
+        
+        return rows_inserted
+    
+    @staticmethod
+    def _column_or_default(df, column, default):
         """
-        Helper method to extract field values from Bloomberg data.
+        Return a DataFrame column, or a constant sequence if the column is missing.
         
         Args:
-            row: DataFrame row
-            field_name: Field name to extract
+            df (DataFrame): The DataFrame
+            column (str): The column name
+            default: The value used when the column is missing
+            
+        Returns:
+            Iterable of the column values, with missing values as None
+        """
+        if column in df.columns:
+            return df[column].astype(object).where(df[column].notna(), None)
+        return itertools.repeat(default, len(df))
+    
+    def _flatten_fields(self, df):
+        """
+        Collect the Bloomberg field values into one column per field mnemonic.
+        
+        The structure of Bloomberg API responses can vary: a field can be a
+        top-level column or a key of a dictionary nested in one of the
+        NESTED_FIELD_CONTAINERS columns. Top-level columns take precedence,
+        followed by the containers in order.
+        
+        Args:
+            df (DataFrame): The pandas DataFrame containing Bloomberg data
             
         Returns:
-            Value or None if not found
+            DataFrame: The field values, one column per mnemonic, aligned with df,
+                with missing values as None
         """
-        # The structure of Bloomberg API response can vary, so we need to handle
-        # different possible locations of the data
+        import pandas as pd
         
-        # Direct access
-        if field_name in row:
-            return row[field_name]
+        # Expand each nested container once for the whole DataFrame
+        containers = [
+            pd.DataFrame([value if isinstance(value, dict) else {} for value in df[container]], index=df.index)
+            for container in NESTED_FIELD_CONTAINERS if container in df.columns
+        ]
         
-        # Try nested dictionaries (common in Bloomberg responses)
-        if 'data' in row and isinstance(row['data'], dict) and field_name in row['data']:
-            return row['data'][field_name]
+        fields = pd.DataFrame(index=df.index)
+        for mnemonic in FIELD_MNEMONICS:
+            if mnemonic in df.columns:
+                fields[mnemonic] = df[mnemonic]
+                continue
             
-        # Try looking in a 'fields' or 'values' dictionary
-        for container in ['fields', 'values', 'results']:
-            if container in row and isinstance(row[container], dict) and field_name in row[container]:
-                return row[container][field_name]
+            values = None
+            for container in containers:
+                if mnemonic in container.columns:
+                    column = container[mnemonic]
+                    values = column if values is None else values.combine_first(column)
+            fields[mnemonic] = values
         
-        # Not found
-        return None
\ No newline at end of file
+        # Bind missing values as NULL rather than NaN
+        return fields.astype(object).where(fields.notna(), None)
@@ -19,6 +19,17 @@ from api.bloomberg_api import BloombergApiClient
 from db.hana_client import HanaClient
 
 
+def positive_int(value):
+    """Argparse type for options that must be a positive integer."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'invalid int value: {value!r}')
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f'must be a positive integer: {value!r}')
+    return number
+
+
 def parse_arguments():
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(description='Bloomberg to SAP HANA Data Integration')
@@ -29,6 +40,12 @@ def parse_arguments():
         help='Download data from Bloomberg but do not store in HANA'
     )
     
+    parser.add_argument(
+        '--no-archive',
+        action='store_true',
+        help='Read the Bloomberg result directly into memory without keeping a copy in the downloads directory'
+    )
+    
     parser.add_argument(
         '--schema',
         type=str,
@@ -48,7 +65,24 @@ def parse_arguments():
         help='Timeout in minutes for waiting for Bloomberg response'
     )
     
-    return parser.parse_args()
+    parser.add_argument(
+        '--chunk-size',
+        type=positive_int,
+        help='Split the identifiers into data requests of this size and process them in parallel'
+    )
+    
+    parser.add_argument(
+        '--max-workers',
+        type=positive_int,
+        default=4,
+        help='Maximum number of concurrent Bloomberg API calls when --chunk-size is set'
+    )
+    
+    args = parser.parse_args()
+    if args.download_only and args.no_archive:
+        parser.error('--no-archive cannot be combined with --download-only')
+    
+    return args
 
 
 def main():
@@ -76,20 +110,35 @@ def main():
         
         # Fetch data from Bloomberg
         logger.info("Fetching financial data from Bloomberg...")
-        df, file_path = bloomberg_client.fetch_financial_data()
+        if args.chunk_size:
+            df, file_path = bloomberg_client.fetch_financial_data_parallel(
+                chunk_size=args.chunk_size,
+                max_workers=args.max_workers,
+                return_dataframe=not args.download_only,
+                timeout_minutes=args.timeout,
+                archive=not args.no_archive
+            )
+        else:
+            df, file_path = bloomberg_client.fetch_financial_data(
+                return_dataframe=not args.download_only,
+                timeout_minutes=args.timeout,
+                archive=not args.no_archive
+            )
         
-        if df is None:
+        if df is None and file_path is None:
             logger.error("Failed to fetch data from Bloomberg")
             return 1
         
-        logger.info(f"Successfully fetched data from Bloomberg: {len(df)} rows")
-        logger.info(f"Data stored in: {file_path}")
-        
-        # Stop here if download-only flag is set
+        # Stop here if download-only flag is set (the file is not parsed)
         if args.download_only:
+            logger.info("Data stored in: %s", file_path)
             logger.info("Download-only flag set. Skipping HANA integration.")
             return 0
         
+        logger.info("Successfully fetched data from Bloomberg: %s rows", len(df))
+        if file_path:
+            logger.info("Data stored in: %s", file_path)
+        
         # Initialize HANA client and store data
         try:
             hana_client = HanaClient(config)
@@ -103,19 +152,19 @@ def main():
             # Create schema if it doesn't exist
             schema_name = config['hana']['schema']
             if not hana_client.create_schema_if_not_exists(schema_name):
-                logger.error(f"Failed to create schema: {schema_name}")
+                logger.error("Failed to create schema: %s", schema_name)
                 return 1
             
             # Create table if it doesn't exist
             table_name = config['hana']['table']
             if not hana_client.create_table(schema_name, table_name):
-                logger.error(f"Failed to create table: {schema_name}.{table_name}")
+                logger.error("Failed to create table: %s.%s", schema_name, table_name)
                 return 1
             
             # Insert data
             rows_inserted = hana_client.insert_data(df, schema_name, table_name)
             if rows_inserted > 0:
-                logger.info(f"Successfully inserted {rows_inserted} rows into {schema_name}.{table_name}")
+                logger.info("Successfully inserted %s rows into %s.%s", rows_inserted, schema_name, table_name)
             else:
                 logger.error("Failed to insert data into SAP HANA")
                 return 1
@@ -132,7 +181,7 @@ def main():
         return 0
         
     except Exception as e:
-        logger.exception(f"Error in Bloomberg to SAP HANA integration: {str(e)}")
+        logger.exception("Error in Bloomberg to SAP HANA integration: %s", e)
         return 1
 
 
@@ -2,19 +2,36 @@
 Configuration utilities for Bloomberg to HANA integration
 """
 
+import atexit
+import copy
+import functools
 import os
 import logging
 import logging.handlers
+import queue
 from dotenv import load_dotenv
 from pathlib import Path
 
+# Log record formatters, shared by every handler setup_logging creates
+FILE_FORMATTER = logging.Formatter('%(asctime)s [%(levelname)-8s] [%(name)s:%(lineno)s]: %(message)s')
+CONSOLE_FORMATTER = logging.Formatter('[%(levelname)-8s] %(message)s')
+
+# Set once setup_logging has attached its handlers, so repeated calls don't duplicate output
+_logging_configured = False
+
 def setup_logging(log_dir="logs"):
     """
     Set up logging configuration.
     
+    Only the first call attaches handlers; later calls return the configured root logger.
+    
     Args:
         log_dir (str): Directory to store log files
     """
+    global _logging_configured
+    if _logging_configured:
+        return logging.getLogger()
+    
     # Create logs directory if it doesn't exist
     Path(log_dir).mkdir(parents=True, exist_ok=True)
     
@@ -22,36 +39,54 @@ def setup_logging(log_dir="logs"):
     logger = logging.getLogger()
     logger.setLevel(logging.INFO)
     
-    # Create formatters
-    file_formatter = logging.Formatter('%(asctime)s [%(levelname)-8s] [%(name)s:%(lineno)s]: %(message)s')
-    console_formatter = logging.Formatter('[%(levelname)-8s] %(message)s')
-    
     # Create and configure file handler (with rotation)
     log_file = os.path.join(log_dir, "bloomberg_to_hana.log")
     file_handler = logging.handlers.RotatingFileHandler(
         log_file, maxBytes=10*1024*1024, backupCount=5
     )
     file_handler.setLevel(logging.DEBUG)
-    file_handler.setFormatter(file_formatter)
+    file_handler.setFormatter(FILE_FORMATTER)
+    
+    # Write the log file from a background thread so callers never wait on file I/O
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.setLevel(logging.DEBUG)
+    listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
     
     # Create and configure console handler
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(console_formatter)
+    console_handler.setFormatter(CONSOLE_FORMATTER)
     
     # Add handlers to the logger
-    logger.addHandler(file_handler)
+    logger.addHandler(queue_handler)
     logger.addHandler(console_handler)
     
+    _logging_configured = True
     return logger
 
 def load_config():
     """
     Load configuration from .env file and environment variables.
     
+    The configuration is read once per process; each call returns its own copy,
+    so callers may override values without affecting later calls.
+    
     Returns:
         dict: Configuration parameters
     """
+    return copy.deepcopy(_load_config())
+
+@functools.lru_cache(maxsize=1)
+def _load_config():
+    """
+    Read and validate the configuration, creating the data directories.
+    
+    Returns:
+        dict: Configuration parameters, shared by all callers
+    """
     # Load environment variables from .env file
     load_dotenv()
     
@@ -105,7 +140,7 @@ def load_config():
         missing_hana.append('HANA_PASSWORD')
         
     if missing_hana:
-        logging.warning(f"Missing SAP HANA configuration: {', '.join(missing_hana)}")
+        logging.warning("Missing SAP HANA configuration: %s", ', '.join(missing_hana))
         logging.warning("HANA integration will be disabled")
         
     # Create directories if they don't exist
@@ -0,0 +1,17 @@
+"""
+Bloomberg field definitions shared by the API and SAP HANA clients
+"""
+
+# Financial data fields requested from Bloomberg and stored in SAP HANA
+FIELD_MNEMONICS = (
+    'TOT_DEBT_TO_TOT_ASSET',
+    'CASH_DVD_COVERAGE',
+    'TOT_DEBT_TO_EBITDA',
+    'CUR_RATIO',
+    'QUICK_RATIO',
+    'GROSS_MARGIN',
+    'INTEREST_COVERAGE_RATIO',
+    'EBITDA_MARGIN',
+    'TOT_LIAB_AND_EQY',
+    'NET_DEBT_TO_SHRHLDR_EQTY',
+)